@@ -2,31 +2,25 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
-from distutils.core import setup, Command
-
-# own modules:
-cur_dir = os.getcwd()
-if sys.argv[0] != '' and sys.argv[0] != '-c':
-    cur_dir = os.path.dirname(sys.argv[0])
-
-libdir = os.path.join(cur_dir, 'src')
-pkg_dir = os.path.join(libdir, 'pb_dbhandler')
-init_py = os.path.join(pkg_dir, '__init__.py')
-if os.path.isdir(pkg_dir) and os.path.isfile(init_py):
-    sys.path.insert(0, os.path.abspath(libdir))
-del init_py
-del pkg_dir
-del libdir
-del cur_dir
-
-import pb_dbhandler
-
-packet_version = pb_dbhandler.__version__
+from setuptools import setup
 
 def read(fname):
     return open(os.path.join(os.path.dirname(__file__), fname)).read()
 
+def get_version():
+    """Extracts __version__ from the package __init__.py without
+    importing the package (and thereby its dependencies)."""
+    content = read(os.path.join('src', 'pb_dbhandler', '__init__.py'))
+    match = re.search(
+            r"""__version__\s*=\s*['"]([^'"]+)['"]""", content)
+    if not match:
+        raise RuntimeError("Unable to find version string.")
+    return match.group(1)
+
+packet_version = get_version()
+
 setup(
     name = 'pb-dbhandler',
     version = packet_version,
@@ -52,8 +46,9 @@ setup(
         'Programming Language :: Python :: 2.7',
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
-    requires = [
-        'pb_base (>= 0.3.10)',
+    python_requires = '>=2.6',
+    install_requires = [
+        'pb_base >= 0.3.10',
         'psycopg2',
     ]
 )
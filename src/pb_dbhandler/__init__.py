@@ -10,6 +10,8 @@
 import os
 import sys
 
+from types import ModuleType
+
 # Own modules
 
 from pb_base.object import PbBaseObjectError
@@ -20,6 +22,39 @@ __contact__ = 'frank.brehm@profitbricks.com'
 __version__ = '0.4.1'
 __license__ = 'GPL3'
 
+__all__ = [
+    'BaseDbError',
+    'BaseDbHandler',
+    'DatabaseEntity',
+    'PgPassFile',
+    'default_db_host',
+    'default_db_port',
+    'max_port_number',
+]
+
+#---------------------------------------------
+# Some module variables
+
+default_db_host = 'localhost'
+"""The default host of the PostgreSQL database."""
+
+default_db_port = 5432
+"""The default TCP port of PostgreSQL on the database machine."""
+
+max_port_number = (2 ** 16) - 1
+"""The highest possible TCP port number."""
+
+#---------------------------------------------
+# Mapping of all lazily importable names to the modules,
+# where they are defined. The submodules (and their heavy
+# third party dependencies like psycopg2) are only imported,
+# if somebody really asks for one of these names.
+
+_lazy_imports = {
+    'BaseDbHandler': 'pb_dbhandler.handler',
+    'DatabaseEntity': 'pb_dbhandler.entity',
+    'PgPassFile': 'pb_dbhandler.pgpass',
+}
 
 #==============================================================================
 class BaseDbError(PbBaseObjectError):
@@ -30,6 +65,46 @@ class BaseDbError(PbBaseObjectError):
 
     pass
 
+#==============================================================================
+class _LazyModule(ModuleType):
+    """
+    Module class for the pb_dbhandler package, which imports the
+    submodules of this package not before one of their public names
+    is requested as an attribute of the package.
+    """
+
+    #--------------------------------------------------------------------------
+    def __getattr__(self, name):
+        """Import the appropriate submodule on first access of a
+        lazy name and cache the result in the module dict."""
+
+        mod_name = _lazy_imports.get(name)
+        if mod_name is None:
+            raise AttributeError("'module' object has no attribute %r." % (
+                    name))
+        module = __import__(mod_name, None, None, [name])
+        obj = getattr(module, name)
+        setattr(self, name, obj)
+        return obj
+
+    #--------------------------------------------------------------------------
+    def __dir__(self):
+        """Give back all members of this module for REPL completion."""
+
+        result = set(self.__dict__.keys())
+        result.update(__all__)
+        return sorted(result)
+
+#---------------------------------------------
+# Replace the current module object by a lazily importing one.
+# A reference to the old module object is kept, because otherwise
+# its dict would be cleaned up on garbage collection.
+
+_old_module = sys.modules[__name__]
+_new_module = sys.modules[__name__] = _LazyModule(__name__)
+_new_module.__dict__.update(_old_module.__dict__)
+_new_module._pb_dbhandler_orig_module = _old_module
+
 #==============================================================================
 
 if __name__ == "__main__":
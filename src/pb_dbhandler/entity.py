@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@author: Frank Brehm
+@contact: frank.brehm@profitbricks.com
+@organization: Profitbricks GmbH
+@copyright: © 2010 - 2013 by Profitbricks GmbH
+@license: GPL3
+@summary: module for a handler class for a single entity
+          inside a PostgreSQL database
+"""
+
+# Standard modules
+import logging
+
+# Own modules
+from pb_dbhandler.handler import BaseDbHandlerError
+from pb_dbhandler.handler import BaseDbHandler
+
+from pb_dbhandler.translate import translator
+
+_ = translator.lgettext
+__ = translator.lngettext
+
+__version__ = '0.1.0'
+
+log = logging.getLogger(__name__)
+
+#==============================================================================
+class DatabaseEntityError(BaseDbHandlerError):
+    """
+    Base error class for all exceptions belonging to a database entity.
+    """
+
+    pass
+
+#==============================================================================
+class DatabaseEntity(BaseDbHandler):
+    """
+    Handler class for an entity inside a PostgreSQL database.
+    """
+
+    # All state of an entity lives in the attributes of BaseDbHandler,
+    # this class doesn't store anything on its own.
+    __slots__ = ()
+
+#==============================================================================
+
+if __name__ == "__main__":
+
+    pass
+
+#==============================================================================
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
@@ -11,35 +11,30 @@
 """
 
 # Standard modules
-import sys
 import os
-import os.path
-import re
 import logging
 
 # Third party modules
-import psycopg2
 
-# Own modules
-from pb_base.common import pp, to_unicode_or_bust, to_utf8_or_bust
-
-from pb_base.object import PbBaseObjectError
-from pb_base.object import PbBaseObject
+# The psycopg2 module is a C extension with a remarkable import time.
+# It is imported not before the first connect() call, so that scripts,
+# which never connect to a database, don't pay for it.
+psycopg2 = None
 
-from pb_base.errors import PbReadTimeoutError
+# Own modules
+from pb_base.common import pp
 
 from pb_base.handler import PbBaseHandlerError
-from pb_base.handler import CommandNotFoundError
 from pb_base.handler import PbBaseHandler
 
 from pb_dbhandler import BaseDbError
+from pb_dbhandler import default_db_host
+from pb_dbhandler import default_db_port
 
-import pb_dbhandler.pgpass
-
-from pb_dbhandler.pgpass import default_pgpass_file
-from pb_dbhandler.pgpass import PgPassFileError
-from pb_dbhandler.pgpass import PgPassFileNotExistsError
-from pb_dbhandler.pgpass import PgPassFile
+# The pb_dbhandler.pgpass module is only needed, if no password was
+# given explicitely. It is imported inside check_password() and
+# as_dict(), so that the module is not loaded for handlers, which got
+# their password from the caller.
 
 from pb_dbhandler.translate import translator
 
@@ -50,6 +45,13 @@ __version__ = '0.2.0'
 
 log = logging.getLogger(__name__)
 
+_pgpass_cache = {}
+"""
+Cache of already performed PgPassFile objects, keyed by the name of
+the .pgpass file. Each value is a tuple of the modification time of
+the file and the PgPassFile object, so a changed file is read again.
+"""
+
 #==============================================================================
 class BaseDbHandlerError(BaseDbError, PbBaseHandlerError):
     """
@@ -64,10 +66,39 @@ class BaseDbHandler(PbBaseHandler):
     Base class for a object with database connectivity.
     """
 
+    # The parent classes in pb_base don't declare __slots__, so every
+    # instance keeps its __dict__ for the inherited attributes. The own
+    # attributes of this class are nevertheless stored in slots, which
+    # makes their lookup a cheap descriptor access.
+    __slots__ = (
+        '_auto_connect',
+        'connection',
+        'cursor',
+        '_db_host',
+        '_db_port',
+        '_db_schema',
+        '_db_user',
+        '_db_passwd',
+        '_connect_params',
+        '_pgpass_file',
+    )
+
+    # All fields emitted by __repr__(), in order. The underscored
+    # instance attributes are read directly, bypassing the properties.
+    _repr_fields = (
+        'db_host',
+        'db_port',
+        'db_schema',
+        'db_user',
+        'db_passwd',
+        'connect_params',
+        'auto_connect',
+    )
+
     #--------------------------------------------------------------------------
     def __init__(self,
-            db_host = 'localhost',
-            db_port = 5432,
+            db_host = default_db_host,
+            db_port = default_db_port,
             db_schema = None,
             db_user = None,
             db_passwd = None,
@@ -143,7 +174,7 @@ class BaseDbHandler(PbBaseHandler):
                 quiet = quiet,
         )
 
-        self._auto_connect = bool(auto_connect)
+        self._auto_connect = True if auto_connect else False
         """
         @ivar: establish connection at the end of initialization
                of this object
@@ -168,7 +199,7 @@ class BaseDbHandler(PbBaseHandler):
         @type: str
         """
 
-        self._db_port = int(db_port)
+        self._db_port = db_port if isinstance(db_port, int) else int(db_port)
         """
         @ivar: The TCP port of PostgreSQL on the database machine.
         @type: int
@@ -217,7 +248,7 @@ class BaseDbHandler(PbBaseHandler):
     @property
     def auto_connect(self):
         """Establish connection at the end of initialization"""
-        return getattr(self, '_auto_connect', False)
+        return self._auto_connect
 
     @auto_connect.setter
     def auto_connect(self, value):
@@ -227,7 +258,7 @@ class BaseDbHandler(PbBaseHandler):
     @property
     def connected(self):
         """Is this object currently connected with database?"""
-        connection = getattr(self, 'connection', None)
+        connection = self.connection
         if not connection:
             return False
         if connection.closed:
@@ -238,7 +269,7 @@ class BaseDbHandler(PbBaseHandler):
     @property
     def cursor_opened(self):
         """Is there currently an open cursor on the database?"""
-        cursor = getattr(self, 'cursor', None)
+        cursor = self.cursor
         if not cursor:
             return False
         if cursor.closed:
@@ -307,6 +338,8 @@ class BaseDbHandler(PbBaseHandler):
         @rtype:  dict
         """
 
+        from pb_dbhandler.pgpass import default_pgpass_file
+
         res = super(BaseDbHandler, self).as_dict(short = short)
 
         res['db_host'] = self.db_host
@@ -335,20 +368,10 @@ class BaseDbHandler(PbBaseHandler):
         out = super(BaseDbHandler, self).__repr__()[:-2]
 
         fields = []
-        if self.db_host:
-            fields.append("db_host=%r" % (self.db_host))
-        if self.db_port:
-            fields.append("db_port=%r" % (self.db_port))
-        if self.db_schema:
-            fields.append("db_schema=%r" % (self.db_schema))
-        if self.db_user:
-            fields.append("db_user=%r" % (self.db_user))
-        if self.db_passwd:
-            fields.append("db_passwd=%r" % (self.db_passwd))
-        if self.connect_params:
-            fields.append("connect_params=%r" % (self.connect_params))
-        if self.auto_connect:
-            fields.append("auto_connect=%r" % (self.auto_connect))
+        for name in self._repr_fields:
+            value = getattr(self, '_' + name)
+            if value:
+                fields.append("%s=%r" % (name, value))
 
         if fields:
             out += ', ' + ", ".join(fields)
@@ -362,12 +385,12 @@ class BaseDbHandler(PbBaseHandler):
         No parameters, no return value.
         """
 
-        if self.verbose > 1:
+        if self.verbose > 1 and log.isEnabledFor(logging.DEBUG):
             log.debug(_("Destroying base database object."))
         self.close()
 
     #--------------------------------------------------------------------------
-    def check_password(self):
+    def check_password(self, _=_):
         """
         Checks the existence of the password.
         If no password was given (self.db_passwd is None), then the password
@@ -378,20 +401,39 @@ class BaseDbHandler(PbBaseHandler):
         if self.db_passwd is not None:
             return
 
-        pgpass = None
+        from pb_dbhandler.pgpass import default_pgpass_file
+        from pb_dbhandler.pgpass import PgPassFile
+        from pb_dbhandler.pgpass import PgPassFileError
+
+        key = self.pgpass_file
+        if key is None:
+            key = default_pgpass_file
 
+        mtime = None
         try:
-            pgpass = PgPassFile(
-                    filename = self.pgpass_file,
-                    appname = self.appname,
-                    base_dir = self.base_dir,
-                    use_stderr = self.use_stderr,
-                    verbose = self.verbose,
-            )
-        except PgPassFileError, e:
-            log.warn(_("Error performing .pgpass file, using empty password: %s"), e)
-            self._db_passwd = ''
-            return
+            mtime = os.stat(key).st_mtime
+        except OSError:
+            pass
+
+        pgpass = None
+        cached = _pgpass_cache.get(key)
+        if cached is not None and mtime is not None and cached[0] == mtime:
+            pgpass = cached[1]
+        else:
+            try:
+                pgpass = PgPassFile(
+                        filename = self.pgpass_file,
+                        appname = self.appname,
+                        base_dir = self.base_dir,
+                        use_stderr = self.use_stderr,
+                        verbose = self.verbose,
+                )
+            except PgPassFileError, e:
+                log.warn(_("Error performing .pgpass file, using empty password: %s"), e)
+                self._db_passwd = ''
+                return
+            if mtime is not None:
+                _pgpass_cache[key] = (mtime, pgpass)
 
         password = pgpass.get_passwd(
                 hostname = self.db_host, port = self.db_port,
@@ -402,11 +444,39 @@ class BaseDbHandler(PbBaseHandler):
         return
 
     #--------------------------------------------------------------------------
-    def connect(self):
+    def _build_conn_params(self):
+        """
+        Builds the parameters for connecting to the database from the
+        current state of this object.
+
+        @return: all parameters to give to psycopg2.connect()
+        @rtype: dict
+
+        """
+
+        c_params = {
+            'host': self._db_host,
+            'database': self._db_schema,
+            'user': self._db_user,
+            'password': self._db_passwd,
+        }
+        if self._db_port and self._db_port != default_db_port:
+            c_params['port'] = self._db_port
+        if self._connect_params:
+            c_params.update(self._connect_params)
+
+        return c_params
+
+    #--------------------------------------------------------------------------
+    def connect(self, _=_):
         """
         Establish a connection with the PostgreSQL database.
         """
 
+        global psycopg2
+        if psycopg2 is None:
+            import psycopg2
+
         if self.connection and not self.connection.closed:
             msg = _("Trying to establish a connection while an existing " +
                     "database connection.")
@@ -414,33 +484,27 @@ class BaseDbHandler(PbBaseHandler):
 
         self.check_password()
 
-        c_params = {}
-        c_params['host'] = self._db_host
-        if self._db_port and self._db_port != 5432:
-            c_params['port'] = self._db_port
-        c_params['database'] = self._db_schema
-        c_params['user'] = self._db_user
-        c_params['password'] = self._db_passwd
-        for key in self._connect_params:
-            c_params[key] = self._connect_params[key]
+        c_params = self._build_conn_params()
 
-        log.debug(_("Used parameters to connect to database:") + "\n%s",
-                pp(c_params))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s\n%s",
+                    _("Used parameters to connect to database:"),
+                    pp(c_params))
 
         connection = psycopg2.connect(**c_params)
         self.connection = connection
-        if self.simulate:
+        if self.simulate and log.isEnabledFor(logging.DEBUG):
             log.debug(_("Setting DB connection to readonly."))
             self.connection.set_session(readonly = True)
 
     #--------------------------------------------------------------------------
-    def open_cursor(self):
+    def open_cursor(self, _=_):
         """
         Tries to open a cursor in the database
         Saves this cursor in self.cursor
         """
 
-        if self.verbose > 3:
+        if self.verbose > 3 and log.isEnabledFor(logging.DEBUG):
             log.debug(_("DB connection: %r"), self.connection)
             if self.connection:
                 if self.connection.closed:
@@ -455,51 +519,51 @@ class BaseDbHandler(PbBaseHandler):
         if self.cursor:
             self.close_cursor()
 
-        if self.verbose > 1:
+        if self.verbose > 1 and log.isEnabledFor(logging.DEBUG):
             log.debug(_("Opening database cursor."))
 
         self.cursor = self.connection.cursor()
 
     #--------------------------------------------------------------------------
-    def close_cursor(self):
+    def close_cursor(self, _=_):
         """
         Closes the current cursor.
         """
 
-        if not self.connected:
-            del self.cursor
-            self.cursor = None
+        cursor = self.cursor
+        if cursor is None:
             return
 
-        if not self.cursor:
+        if not self.connected:
+            self.cursor = None
             return
 
-        if self.verbose > 1:
+        if self.verbose > 1 and log.isEnabledFor(logging.DEBUG):
             log.debug(_("Closing database cursor."))
 
-        if not self.cursor.closed:
-            self.cursor.close()
+        if not cursor.closed:
+            cursor.close()
 
-        del self.cursor
         self.cursor = None
 
         return
 
     #--------------------------------------------------------------------------
-    def close(self):
+    def close(self, _=_):
         """
         Close the database connection.
         """
 
         self.close_cursor()
 
-        if self.connection:
-            if not self.connection.closed:
-                log.debug(_("Closing the database connection."))
-                self.connection.close()
-            if self.verbose > 2:
+        connection = self.connection
+        if connection:
+            if not connection.closed:
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(_("Closing the database connection."))
+                connection.close()
+            if self.verbose > 2 and log.isEnabledFor(logging.DEBUG):
                 log.debug(_("Destroying db connection object."))
-            del self.connection
             self.connection = None
 
 #==============================================================================
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+@author: Frank Brehm
+@contact: frank.brehm@profitbricks.com
+@organization: Profitbricks GmbH
+@copyright: © 2010 - 2013 by Profitbricks GmbH
+@license: GPL3
+@summary: module for some common used helper functions and classes
+          for working with database applications
+"""
+
+# Standard modules
+import logging
+import argparse
+
+# Own modules
+from pb_base.common import to_unicode_or_bust
+
+from pb_dbhandler import default_db_host
+from pb_dbhandler import default_db_port
+from pb_dbhandler import max_port_number
+
+from pb_dbhandler.translate import translator
+
+_ = translator.lgettext
+__ = translator.lngettext
+
+__version__ = '0.1.0'
+
+log = logging.getLogger(__name__)
+
+#---------------------------------------------
+# The translated error messages of _port_type(). They are looked up
+# once at module load instead of performing gettext lookups on every
+# parsed port option.
+
+_port_msg_invalid = _(
+        "Invalid port number %r of a PostgreSQL database.")
+_port_msg_low = _(
+        "The port number of a PostgreSQL database must be greater than zero.")
+_port_msg_high = _(
+        "The port number of a PostgreSQL database must be less or equal %d.") % (
+        max_port_number)
+
+#---------------------------------------------
+# The translated texts of init_db_argparser(), looked up once at
+# module load instead of on every parser construction.
+
+_db_group_title = _('Database options')
+_h_db_host_tpl = _("The host of the PostgreSQL database (Default: %r).")
+_h_db_port_tpl = _("The TCP port of PostgreSQL on the database host (Default: %d).")
+_h_db_schema_tpl = _("The database schema (database) used on the DB host (Default: %r).")
+_h_db_user_tpl = _("The database user using for connecting to the database (Default: %r).")
+
+_help_cache = {}
+"""
+Cache of the formatted help texts of init_db_argparser(), keyed by the
+tuple of default values. Applications build their parsers with a fixed
+set of defaults, so the formatting is done only once per combination.
+"""
+
+#==============================================================================
+def _port_type(value):
+    """
+    Checks the given value for a valid TCP port number of a
+    PostgreSQL database. Usable as type argument in
+    argparse.ArgumentParser.add_argument().
+
+    @raise argparse.ArgumentTypeError: on an invalid port number
+
+    @param value: the value to check
+    @type value: str
+
+    @return: the checked port number
+    @rtype: int
+
+    """
+
+    try:
+        port = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(_port_msg_invalid % (value))
+
+    if not 1 <= port <= max_port_number:
+        if port < 1:
+            raise argparse.ArgumentTypeError(_port_msg_low)
+        raise argparse.ArgumentTypeError(_port_msg_high)
+
+    return port
+
+#==============================================================================
+def init_db_argparser(arg_parser,
+        def_db_host = default_db_host,
+        def_db_port = default_db_port,
+        def_db_schema = None,
+        def_db_user = None,
+        ):
+    """
+    Adds a argument group for common database options to the given
+    argument parser.
+
+    @param arg_parser: the argument parser to extend
+    @type arg_parser: argparse.ArgumentParser
+    @param def_db_host: the default database host to use
+    @type def_db_host: str
+    @param def_db_port: the default TCP port of the database
+    @type def_db_port: int
+    @param def_db_schema: the default database schema to use
+    @type def_db_schema: str or None
+    @param def_db_user: the default database user to use
+    @type def_db_user: str or None
+
+    @return: the created argument group
+
+
+    """
+
+    key = (def_db_host, def_db_port, def_db_schema, def_db_user)
+    helps = _help_cache.get(key)
+    if helps is None:
+        helps = (
+            _h_db_host_tpl % (def_db_host),
+            _h_db_port_tpl % (def_db_port),
+            _h_db_schema_tpl % (def_db_schema),
+            _h_db_user_tpl % (def_db_user),
+        )
+        _help_cache[key] = helps
+
+    db_group = arg_parser.add_argument_group(_db_group_title)
+
+    db_group.add_argument(
+            '--db-host',
+            dest = 'db_host',
+            default = def_db_host,
+            help = helps[0],
+    )
+
+    db_group.add_argument(
+            '--db-port',
+            dest = 'db_port',
+            type = _port_type,
+            default = def_db_port,
+            help = helps[1],
+    )
+
+    db_group.add_argument(
+            '--db-schema',
+            dest = 'db_schema',
+            default = def_db_schema,
+            help = helps[2],
+    )
+
+    db_group.add_argument(
+            '--db-user',
+            dest = 'db_user',
+            default = def_db_user,
+            help = helps[3],
+    )
+
+    return db_group
+
+#==============================================================================
+def init_db_cfg_spec(spec,
+        def_db_host = default_db_host,
+        def_db_port = default_db_port,
+        def_db_schema = None,
+        def_db_user = None,
+        ):
+    """
+    Initializes the 'db' section of the given configuration
+    specification, usable for validating a configuration file.
+
+    @param spec: the configuration specification to extend
+    @type spec: ConfigObj
+    @param def_db_host: the default database host to use
+    @type def_db_host: str
+    @param def_db_port: the default TCP port of the database
+    @type def_db_port: int
+    @param def_db_schema: the default database schema to use
+    @type def_db_schema: str or None
+    @param def_db_user: the default database user to use
+    @type def_db_user: str or None
+
+    @return: None
+
+    """
+
+    if not u'db' in spec:
+        spec[u'db'] = {}
+        spec.comments[u'db'].insert(0, u'')
+        spec.comments[u'db'].insert(1, u'Database connection settings')
+
+    # The section and its comments are bound once here; the defaults
+    # are converted once, not per stanza.
+    db_spec = spec[u'db']
+    db_comments = db_spec.comments
+
+    def_db_host = to_unicode_or_bust(def_db_host)
+    def_db_schema = to_unicode_or_bust(def_db_schema)
+    def_db_user = to_unicode_or_bust(def_db_user)
+
+    items = (
+        (u'host',
+            u"string(default = '%s')" % (def_db_host),
+            u'The hostname or IP address of the PostgreSQL database server.'),
+        (u'port',
+            u'integer(min = 1, max = %d, default = %d)' % (
+                    max_port_number, def_db_port),
+            u'The TCP port of PostgreSQL on the database server.'),
+        (u'schema',
+            u"string(default = '%s')" % (def_db_schema),
+            u'The database schema (database) used on the database server.'),
+        (u'user',
+            u"string(default = '%s')" % (def_db_user),
+            u'The database user using for connecting to the database.'),
+    )
+
+    for key, spec_str, comment in items:
+        if key not in db_spec:
+            db_spec[key] = spec_str
+            db_comments[key].extend((u'', comment))
+
+#==============================================================================
+
+if __name__ == "__main__":
+
+    pass
+
+#==============================================================================
+
+# vim: tabstop=4 expandtab shiftwidth=4 softtabstop=4
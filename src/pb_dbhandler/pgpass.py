@@ -10,25 +10,20 @@
 """
 
 # Standard modules
-import sys
 import os
 import stat
+import errno
 import logging
 import re
-import glob
 
 # Third party modules
 
 # Own modules
-from pb_base.common import pp, to_unicode_or_bust, to_utf8_or_bust
+from pb_base.common import pp
 
-from pb_base.object import PbBaseObjectError
 from pb_base.object import PbBaseObject
 
-from pb_base.errors import PbReadTimeoutError
-
 from pb_base.handler import PbBaseHandlerError
-from pb_base.handler import CommandNotFoundError
 from pb_base.handler import PbBaseHandler
 
 from pb_dbhandler import BaseDbError
@@ -53,6 +48,105 @@ except KeyError, e:
     log.error(_("Environment variable %r not set."), 'HOME')
     default_pgpass_file = '.pgpass'
 
+_re_pgpass_line = re.compile(
+        r'^(?P<hostname>(?:\\.|[^:\\])*):'
+        r'(?P<port>(?:\\.|[^:\\])*):'
+        r'(?P<database>(?:\\.|[^:\\])*):'
+        r'(?P<username>(?:\\.|[^:\\])*):'
+        r'(?P<password>.*)$')
+"""
+Compiled regex matching a complete .pgpass line and capturing all
+five fields in one sweep, honouring backslash escaped colons.
+"""
+
+_re_unescape = re.compile(r'\\([\\:])')
+"""Compiled regex matching the backslash escapes of a .pgpass field."""
+
+_realpath_cache = {}
+"""Cache of os.path.realpath() results, keyed by the raw path."""
+
+_missing = object()
+"""Sentinel for cache lookups, where None is a valid cached value."""
+
+#==============================================================================
+def _cached_realpath(path, _cache = _realpath_cache):
+    """
+    Gives back the canonical path of the given file like
+    os.path.realpath(), but caches the result, because realpath()
+    stats every component of the path on every call.
+
+    @param path: the path to canonicalize
+    @type path: str
+
+    @return: the canonical path
+    @rtype: str
+
+    """
+
+    result = _cache.get(path)
+    if result is None:
+        result = os.path.realpath(path)
+        _cache[path] = result
+    return result
+
+#==============================================================================
+def _unescape(value, _sub = _re_unescape.sub):
+    """
+    Resolves the backslash escapes (for '\\' and ':') in the given
+    field of a .pgpass line in one left-to-right pass.
+
+    @param value: the raw field value
+    @type value: str
+
+    @return: the unescaped field value
+    @rtype: str
+
+    """
+
+    if '\\' not in value:
+        return value
+    return _sub(r'\1', value)
+
+#==============================================================================
+class LazyPP(object):
+    """
+    Deferred pretty printing for debug log arguments. The given
+    callable is only invoked - and its result pretty printed - when
+    the log record is actually formatted, so disabled or filtered
+    debug statements don't pay for building and formatting the data.
+    """
+
+    __slots__ = ('func',)
+
+    #--------------------------------------------------------------------------
+    def __init__(self, func):
+
+        self.func = func
+
+    #--------------------------------------------------------------------------
+    def __str__(self):
+
+        return pp(self.func())
+
+#==============================================================================
+class _PgPassRow(object):
+    """
+    Lightweight internal record for one valid line of a .pgpass file.
+    In contrast to PgPassEntry it carries no PbBaseObject machinery -
+    a parsed file creates one of these per line.
+    """
+
+    __slots__ = ('hostname', 'port', 'database', 'username', 'password')
+
+    #--------------------------------------------------------------------------
+    def __init__(self, hostname, port, database, username, password):
+
+        self.hostname = hostname
+        self.port = port
+        self.database = database
+        self.username = username
+        self.password = password
+
 #==============================================================================
 class PgPassFileError(BaseDbError):
     """Base error class for all exceptions in this module."""
@@ -171,6 +265,12 @@ class PgPassEntry(PbBaseObject):
         self._username = username
         self._password = password
 
+        # The lowercase variants of the comparable fields, computed
+        # once here instead of on every match() call.
+        self._hostname_lc = hostname.lower() if hostname is not None else None
+        self._database_lc = database.lower() if database is not None else None
+        self._username_lc = username.lower() if username is not None else None
+
         self.initialized = True
 
     #------------------------------------------------------------
@@ -217,11 +317,11 @@ class PgPassEntry(PbBaseObject):
 
         res = super(PgPassEntry, self).as_dict(short = short)
 
-        res['hostname'] = self.hostname
-        res['port'] = self.port
-        res['database'] = self.database
-        res['username'] = self.username
-        res['password'] = self.password
+        res['hostname'] = self._hostname
+        res['port'] = self._port
+        res['database'] = self._database
+        res['username'] = self._username
+        res['password'] = self._password
 
         return res
 
@@ -232,15 +332,15 @@ class PgPassEntry(PbBaseObject):
         out = super(PgPassEntry, self).__repr__()[:-2]
 
         fields = []
-        if self.hostname:
-            fields.append("hostname=%r" % (self.hostname))
-        if self.port:
-            fields.append("port=%r" % (self.port))
-        if self.database:
-            fields.append("database=%r" % (self.database))
-        if self.username:
-            fields.append("username=%r" % (self.username))
-        fields.append("password=%r" % (self.password))
+        if self._hostname:
+            fields.append("hostname=%r" % (self._hostname))
+        if self._port:
+            fields.append("port=%r" % (self._port))
+        if self._database:
+            fields.append("database=%r" % (self._database))
+        if self._username:
+            fields.append("username=%r" % (self._username))
+        fields.append("password=%r" % (self._password))
 
         if fields:
             out += ', ' + ", ".join(fields)
@@ -255,7 +355,8 @@ class PgPassEntry(PbBaseObject):
 
         @param hostname: the hostname or IP address of the PostGreSQL server
         @type hostname: str or None
-        @param port: the TCP port of the PostGreSQL server
+        @param port: the TCP port of the PostGreSQL server,
+                     must already be coerced to an int by the caller
         @type port: int or None
         @param database: the database name on the PostGreSQL server
         @type database: str or None
@@ -267,22 +368,20 @@ class PgPassEntry(PbBaseObject):
 
         """
 
-        port = int(port)
-
-        if self.hostname is not None:
-            if self.hostname.lower() != hostname.lower():
+        if self._hostname_lc is not None:
+            if self._hostname_lc != hostname.lower():
                 return False
 
-        if self.port is not None:
-            if self.port != port:
+        if self._port is not None:
+            if self._port != port:
                 return False
 
-        if self.database is not None:
-            if self.database.lower() != database.lower():
+        if self._database_lc is not None:
+            if self._database_lc != database.lower():
                 return False
 
-        if self.username is not None:
-            if self.username.lower() != username.lower():
+        if self._username_lc is not None:
+            if self._username_lc != username.lower():
                 return False
 
         return True
@@ -355,7 +454,7 @@ class PgPassFile(PbBaseHandler):
 
         if not os.path.exists(filename):
             raise PgPassFileNotExistsError(filename)
-        self._filename = os.path.realpath(filename)
+        self._filename = _cached_realpath(filename)
 
         self._force = bool(force)
         """
@@ -363,6 +462,43 @@ class PgPassFile(PbBaseHandler):
         @type: bool
         """
 
+        self._rows_cache = None
+        """
+        @ivar: the parsed rows of the last read of the .pgpass file
+        @type: None or list of _PgPassRow
+        """
+
+        self._stat_key = None
+        """
+        @ivar: some stat() properties of the .pgpass file at the time
+               of the last parse, used to detect a changed file
+        @type: None or tuple
+        """
+
+        self._index = None
+        """
+        @ivar: lookup index over the parsed entries, mapping a
+               normalized (hostname, port, database, username) tuple
+               to the row number and the password of the first entry
+               with this key
+        @type: None or dict
+        """
+
+        self._passwd_cache = {}
+        """
+        @ivar: memoized results of get_passwd(), keyed by the
+               normalized lookup tuple, dropped whenever the .pgpass
+               file changes
+        @type: dict
+        """
+
+        self._entries_cache = None
+        """
+        @ivar: the PgPassEntry objects of the last entries() call,
+               dropped whenever the .pgpass file changes
+        @type: None or list of PgPassEntry
+        """
+
         self.initialized = True
 
     #------------------------------------------------------------
@@ -426,32 +562,39 @@ class PgPassFile(PbBaseHandler):
         @rtype: str
         """
 
-        if not os.path.exists(self.filename):
-            raise PgPassFileNotExistsError(self.filename)
-        if not os.access(self.filename, os.R_OK):
-            raise PgPassFileNotReadableError(self.filename)
-
-        fstat = os.stat(self.filename)
-        mode = fstat.st_mode
-        user_mode = mode & stat.S_IRWXU
-        group_mode = mode & stat.S_IRWXG
-        other_mode = mode & stat.S_IRWXO
+        try:
+            fd = os.open(self._filename, os.O_RDONLY)
+        except OSError, e:
+            if e.errno == errno.ENOENT:
+                raise PgPassFileNotExistsError(self._filename)
+            raise PgPassFileNotReadableError(self._filename)
+
+        try:
+
+            fstat = os.fstat(fd)
+
+            mode = fstat.st_mode
+            group_mode = mode & stat.S_IRWXG
+            other_mode = mode & stat.S_IRWXO
+
+            if group_mode or other_mode:
+                msg = ''
+                if not group_mode:
+                    msg = _("Others have permissions on %r.") % (self.filename)
+                elif not other_mode:
+                    msg = _("Group has permissions on %r.") % (self.filename)
+                else:
+                    msg = _("Group and others have permissions on %r.") % (self.filename)
+                if self.force:
+                    log.debug(msg)
+                else:
+                    log.warn(msg)
+                    return ''
 
-        if group_mode or other_mode:
-            msg = ''
-            if not group_mode:
-                msg = _("Others have permissions on %r.") % (self.filename)
-            elif not other_mode:
-                msg = _("Group has permissions on %r.") % (self.filename)
-            else:
-                msg = _("Group and others have permissions on %r.") % (self.filename)
-            if self.force:
-                log.debug(msg)
-            else:
-                log.warn(msg)
-                return ''
+            return os.read(fd, fstat.st_size)
 
-        return self.read_file(self.filename)
+        finally:
+            os.close(fd)
 
     #--------------------------------------------------------------------------
     def entries(self):
@@ -466,15 +609,76 @@ class PgPassFile(PbBaseHandler):
 
         """
 
-        content = self.read()
+        rows = self._get_rows()
+        if self._entries_cache is not None:
+            return self._entries_cache
+
         result = []
+        for row in rows:
+            result.append(PgPassEntry(
+                    hostname = row.hostname,
+                    port = row.port,
+                    database = row.database,
+                    username = row.username,
+                    password = row.password,
+                    appname = self.appname,
+                    verbose = self.verbose,
+                    base_dir = self.base_dir,
+                    use_stderr = self.use_stderr,
+            ))
+
+        self._entries_cache = result
+        return result
+
+    #--------------------------------------------------------------------------
+    def _get_rows(self):
+        """
+        Reads and parses the .pgpass file into a list of internal
+        _PgPassRow records, reusing the cached list as long as the
+        file is unchanged.
+
+        @return: all parsed rows
+        @rtype: list of _PgPassRow
+
+        """
+
+        stat_key = self._current_stat_key()
+        if (stat_key is not None and stat_key == self._stat_key and
+                self._rows_cache is not None):
+            return self._rows_cache
+
+        content = self.read()
         if not content:
             if self.verbose > 2:
                 log.debug(_("No valid content in %r found."), self.filename)
-            return result
+            result = []
+        else:
+            result = list(self._iter_rows(content))
+
+        self._rows_cache = result
+        self._stat_key = stat_key
+        self._index = None
+        self._passwd_cache = {}
+        self._entries_cache = None
+
+        return result
+
+    #--------------------------------------------------------------------------
+    def _iter_rows(self, content):
+        """
+        Parses the given content of a .pgpass file and yields an
+        internal _PgPassRow record for every valid line. Consumers,
+        which only need a prefix of the file, may stop early without
+        paying for parsing the rest.
+
+        @param content: the content of the .pgpass file
+        @type content: str
+
+        @return: iterator over the parsed rows
+        @rtype: generator of _PgPassRow
+
+        """
 
-        re_comment = re.compile(r'^#')
-        re_fields = re.compile(r'(?<!\\):')
         row_nr = 0
 
         for line in content.splitlines():
@@ -482,7 +686,7 @@ class PgPassFile(PbBaseHandler):
             line = line.strip()
             if not line:
                 continue
-            if re_comment.search(line):
+            if line.startswith('#'):
                 continue
 
             hostname = None
@@ -491,18 +695,20 @@ class PgPassFile(PbBaseHandler):
             username = None
             password = None
 
-            fields = re_fields.split(line, 4)
-            if self.verbose > 3:
-                log.debug(_("Got fields: %r"), fields)
-            if not len(fields) == 5:
-                msg = _("Invalid entry %(entry)r in %(file)r line %(rownum)d found, only %(nr)d fields found instead of 5.") % {
+            match = _re_pgpass_line.match(line)
+            if not match:
+                msg = _("Invalid entry %(entry)r in %(file)r line %(rownum)d found.") % {
                         'entry': line, 'file': self.filename,
-                        'rownum': row_nr, 'nr': len(fields)}
+                        'rownum': row_nr}
                 log.warn(msg)
                 continue
+            fields = match.group(
+                    'hostname', 'port', 'database', 'username', 'password')
+            if self.verbose > 3:
+                log.debug(_("Got fields: %r"), fields)
 
             if fields[0] != '*':
-                hostname = fields[0].replace('\\\\', '\\').replace('\\:', ':')
+                hostname = _unescape(fields[0])
             if fields[1] != '*':
                 try:
                     port = int(fields[1])
@@ -512,26 +718,61 @@ class PgPassFile(PbBaseHandler):
                     log.warn(msg)
                     continue
             if fields[2] != '*':
-                database = fields[2].replace('\\\\', '\\').replace('\\:', ':')
+                database = _unescape(fields[2])
             if fields[3] != '*':
-                username = fields[3].replace('\\\\', '\\').replace('\\:', ':')
-            password = fields[4].replace('\\\\', '\\').replace('\\:', ':')
-
-            entry = PgPassEntry(
-                    hostname = hostname,
-                    port = port,
-                    database = database,
-                    username = username,
-                    password = password,
-                    appname = self.appname,
-                    verbose = self.verbose,
-                    base_dir = self.base_dir,
-                    use_stderr = self.use_stderr,
-            )
+                username = _unescape(fields[3])
+            password = _unescape(fields[4])
 
-            result.append(entry)
+            yield _PgPassRow(hostname, port, database, username, password)
 
-        return result
+    #--------------------------------------------------------------------------
+    def _current_stat_key(self):
+        """
+        Performs a stat() on the .pgpass file and gives back those
+        of its properties, which are usable to detect a changed file.
+
+        @return: mtime, size, inode number and mode of the file, or
+                 None, if the file could not be stat'ed
+        @rtype: tuple or None
+
+        """
+
+        try:
+            fstat = os.stat(self._filename)
+        except OSError:
+            return None
+
+        return (fstat.st_mtime, fstat.st_size, fstat.st_ino, fstat.st_mode)
+
+    #--------------------------------------------------------------------------
+    def _build_index(self, entries):
+        """
+        Builds the lookup index over the given entries for
+        get_passwd(). For each normalized key the row number and the
+        password of its first entry are stored, so the ordering of
+        the .pgpass file stays authoritative.
+
+        @param entries: the parsed rows of the .pgpass file
+        @type entries: list of _PgPassRow
+
+        @return: None
+
+        """
+
+        index = {}
+        row = 0
+        for entry in entries:
+            key = (
+                entry.hostname.lower() if entry.hostname is not None else None,
+                entry.port,
+                entry.database.lower() if entry.database is not None else None,
+                entry.username.lower() if entry.username is not None else None,
+            )
+            if key not in index:
+                index[key] = (row, entry.password)
+            row += 1
+
+        self._index = index
 
     #--------------------------------------------------------------------------
     def get_passwd(self, hostname, port, database, username):
@@ -553,31 +794,64 @@ class PgPassFile(PbBaseHandler):
 
         """
 
-        passwd = None
+        rows = self._get_rows()
+        if self.verbose > 3 and log.isEnabledFor(logging.DEBUG):
 
-        entries = self.entries()
-        if self.verbose > 3:
-            l = []
-            for entry in entries:
-                d = entry.as_dict(True)
-                d['password'] = '*********'
-                l.append(d)
-            log.debug(_("Found entries in %(file)r:\n%(list)s") % {
-                    'file': self.filename, 'list': pp(l)})
+            def masked_rows():
+                l = []
+                for row in rows:
+                    l.append({
+                        'hostname': row.hostname,
+                        'port': row.port,
+                        'database': row.database,
+                        'username': row.username,
+                        'password': '*********',
+                    })
+                return l
 
-        for entry in entries:
-            if entry.match(hostname = hostname, port = port,
-                    database = database, username = username):
-                passwd = entry.password
-                break
+            log.debug(_("Found entries in %(file)r:\n%(list)s"), {
+                    'file': self.filename, 'list': LazyPP(masked_rows)})
 
-        if self.verbose > 2:
+        port = int(port)
+        host_lc = hostname.lower() if hostname is not None else None
+        db_lc = database.lower() if database is not None else None
+        user_lc = username.lower() if username is not None else None
+
+        lookup_key = (host_lc, port, db_lc, user_lc)
+        passwd = self._passwd_cache.get(lookup_key, _missing)
+        if passwd is _missing:
+
+            if self._index is None:
+                self._build_index(rows)
+
+            # Probing all 16 wildcard combinations of the lookup key.
+            # The hit of the earliest row in the file wins, which keeps
+            # the first-match-wins semantics of a .pgpass file.
+            passwd = None
+            best = None
+            index_get = self._index.get
+            for key_host in (host_lc, None):
+                for key_port in (port, None):
+                    for key_db in (db_lc, None):
+                        for key_user in (user_lc, None):
+                            hit = index_get(
+                                    (key_host, key_port, key_db, key_user))
+                            if hit is not None:
+                                if best is None or hit[0] < best[0]:
+                                    best = hit
+            if best is not None:
+                passwd = best[1]
+
+            self._passwd_cache[lookup_key] = passwd
+
+        if self.verbose > 2 and log.isEnabledFor(logging.DEBUG):
             if passwd is not None:
                 msg = _("Password found for host %(host)r, port %(port)d, database %(db)r and user %(usr)r.")
             else:
                 msg = _("No password found for host %(host)r, port %(port)d, database %(db)r and user %(usr)r.")
-            msg = msg % {'host': hostname, 'port': port, 'db': database, 'usr': username}
-            log.debug(msg)
+            log.debug(msg, {
+                    'host': hostname, 'port': port,
+                    'db': database, 'usr': username})
 
         return passwd
 
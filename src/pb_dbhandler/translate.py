@@ -22,14 +22,21 @@ locale_dir = os.path.join(basedir, 'po')
 if not os.path.isdir(locale_dir):
     locale_dir = None
 
-mo_file = gettext.find('py_pb_dbhandler', locale_dir)
-
 translator = gettext.translation('py_pb_dbhandler', locale_dir, fallback = True)
 """
 The main gettext-translator object, which can be imported
 from other modules.
 """
 
+if not getattr(translator, '_catalog', None):
+    # There is no message catalog (English/C locale or no compiled
+    # .mo files) - replace the fallback lookup methods with plain
+    # identity functions, so all _(...) calls of the other modules
+    # become as cheap as possible.
+    translator.lgettext = lambda message: message
+    translator.lngettext = (
+            lambda singular, plural, n: singular if n == 1 else plural)
+
 _ = translator.lgettext
 __ = translator.lngettext
 
@@ -37,6 +44,8 @@ __ = translator.lngettext
 
 if __name__ == "__main__":
 
+    mo_file = gettext.find('py_pb_dbhandler', locale_dir)
+
     print _("Basedir: %r") % (basedir)
     print _("Found .mo-file: %r") % (mo_file)
 
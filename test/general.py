@@ -68,13 +68,52 @@ def init_root_logger(verbose = 0):
 #==============================================================================
 class DbHandlerTestcase(unittest.TestCase):
 
+    default_verbose = 0
+    """
+    Fallback verbosity level for instances created without an explicit
+    verbose argument, e.g. by unittest.defaultTestLoader.
+    """
+
     #--------------------------------------------------------------------------
-    def __init__(self, methodName = 'runTest', verbose = 0):
+    def __init__(self, methodName = 'runTest', verbose = None):
 
+        if verbose is None:
+            verbose = self.default_verbose
         self._verbose = int(verbose)
 
         super(DbHandlerTestcase, self).__init__(methodName)
 
+    #--------------------------------------------------------------------------
+    @classmethod
+    def setUpClass(cls):
+
+        cls._path_exists = {}
+
+    #--------------------------------------------------------------------------
+    @classmethod
+    def _cached_exists(cls, path):
+        """
+        Gives back, whether the given path exists, like os.path.exists(),
+        but caches the result per test class to save repeated stat()
+        calls on paths, which don't change during a test run.
+        """
+
+        exists = cls._path_exists.get(path)
+        if exists is None:
+            exists = os.path.exists(path)
+            cls._path_exists[path] = exists
+        return exists
+
+    #--------------------------------------------------------------------------
+    @classmethod
+    def _forget_exists(cls, path):
+        """
+        Drops the cached existence state of the given path, e.g. after
+        removing a temporary file.
+        """
+
+        cls._path_exists.pop(path, None)
+
     #--------------------------------------------------------------------------
     @property
     def verbose(self):
@@ -39,16 +39,57 @@ from pb_dbhandler.handler import BaseDbHandler
 
 log = logging.getLogger(__name__)
 
+_DEFAULT_PGPASS_EXISTS = os.path.exists(default_pgpass_file)
+"""
+Whether the default .pgpass file exists - computed once at import,
+because it doesn't change during a test suite run.
+"""
+
 #==============================================================================
 class TestBaseDbHandler(DbHandlerTestcase):
 
+    dbhandler = None
+    """
+    The BaseDbHandler object shared by all tests of this class. It is
+    created lazily on the first setUp() call, because the verbosity
+    level is only known per test instance, and closed in tearDown()
+    after every test to reset the connection state.
+    """
+
     #--------------------------------------------------------------------------
     def setUp(self):
         self.db_host = 'app1.dc1.de.profitbricks.net'
         self.db_port = 5432
         self.db_schema = 'vdc'
         self.db_user = 'glassfish'
-        pass
+
+        cls = self.__class__
+        if cls.dbhandler is None:
+            cls.dbhandler = BaseDbHandler(
+                    db_host = self.db_host,
+                    db_port = self.db_port,
+                    db_schema = self.db_schema,
+                    db_user = self.db_user,
+                    verbose = self.verbose,
+            )
+
+    #--------------------------------------------------------------------------
+    def tearDown(self):
+
+        if self.dbhandler is not None and self.dbhandler.connected:
+            self.dbhandler.close()
+
+    #--------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+
+        # Close the shared handler explicitly and drop the reference,
+        # so the connection (and possible reference cycles through it)
+        # are torn down deterministically instead of depending on the
+        # garbage collector.
+        if cls.dbhandler is not None:
+            cls.dbhandler.close()
+            cls.dbhandler = None
 
     #--------------------------------------------------------------------------
     def test_dbhandler_object(self):
@@ -57,20 +98,13 @@ class TestBaseDbHandler(DbHandlerTestcase):
 
         log.debug("Default .pgpass file: %r", default_pgpass_file)
 
-        dbhandler = BaseDbHandler(
-                db_host = self.db_host,
-                db_port = self.db_port,
-                db_schema = self.db_schema,
-                db_user = self.db_user,
-                verbose = self.verbose,
-        )
+        dbhandler = self.dbhandler
 
         if self.verbose > 2:
             log.debug("BaseDbHandler object:\n%s", dbhandler)
         self.assertIsInstance(dbhandler, BaseDbHandler)
         self.assertEqual(dbhandler.connected, False)
         self.assertEqual(dbhandler.cursor_opened, False)
-        del dbhandler
 
     #--------------------------------------------------------------------------
     def test_dbhandler_checkpw(self):
@@ -79,37 +113,21 @@ class TestBaseDbHandler(DbHandlerTestcase):
 
         log.debug("Using .pgpass file: %r", default_pgpass_file)
 
-        dbhandler = BaseDbHandler(
-                db_host = self.db_host,
-                db_port = self.db_port,
-                db_schema = self.db_schema,
-                db_user = self.db_user,
-                verbose = self.verbose,
-        )
+        dbhandler = self.dbhandler
 
         dbhandler.check_password()
         self.assertIsNotNone(dbhandler.db_passwd)
-        if not os.path.exists(default_pgpass_file):
+        if not _DEFAULT_PGPASS_EXISTS:
             self.assertEqual(dbhandler.db_passwd, '')
 
-        del dbhandler
-
     #--------------------------------------------------------------------------
+    @unittest.skipUnless(_DEFAULT_PGPASS_EXISTS,
+            "Default .pgpass file doesn't exists.")
     def test_dbhandler_connect(self):
 
         log.info("Testing connect() of a BaseDbHandler object.")
-        if not os.path.exists(default_pgpass_file):
-            log.warn("File %r doesn't exists, cannot check connect().",
-                    default_pgpass_file)
-            return
-
-        dbhandler = BaseDbHandler(
-                db_host = self.db_host,
-                db_port = self.db_port,
-                db_schema = self.db_schema,
-                db_user = self.db_user,
-                verbose = self.verbose,
-        )
+
+        dbhandler = self.dbhandler
 
         dbhandler.connect()
         if self.verbose > 2:
@@ -117,8 +135,6 @@ class TestBaseDbHandler(DbHandlerTestcase):
         self.assertEqual(dbhandler.connected, True)
         self.assertEqual(dbhandler.cursor_opened, False)
 
-        del dbhandler
-
 #==============================================================================
 
 
@@ -131,11 +147,9 @@ if __name__ == '__main__':
 
     log.info("Starting tests ...")
 
-    suite = unittest.TestSuite()
-
-    suite.addTest(TestBaseDbHandler('test_dbhandler_object', verbose))
-    suite.addTest(TestBaseDbHandler('test_dbhandler_checkpw', verbose))
-    suite.addTest(TestBaseDbHandler('test_dbhandler_connect', verbose))
+    TestBaseDbHandler.default_verbose = verbose
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(
+            TestBaseDbHandler)
 
     runner = unittest.TextTestRunner(verbosity = verbose)
 
@@ -11,9 +11,11 @@
 
 import unittest
 import os
+import re
 import sys
 import logging
 import tempfile
+import shutil
 import stat
 
 libdir = os.path.abspath(os.path.join(os.path.dirname(sys.argv[0]), '..', 'src'))
@@ -35,12 +37,113 @@ from pb_dbhandler.pgpass import PgPassFileError
 from pb_dbhandler.pgpass import PgPassFileNotExistsError
 from pb_dbhandler.pgpass import PgPassFileNotReadableError
 from pb_dbhandler.pgpass import PgPassFile
+from pb_dbhandler.pgpass import LazyPP
 
 log = logging.getLogger(__name__)
 
+#---------------------------------------------
+# The .pgpass fixture payloads, joined once at module level, so every
+# fixture file is written with one single write call.
+
+PGPASS_FIXTURE_OK = (
+        b'localhost:5432:*:glassfish:ov4Lael3ugoh\n'
+        b'# bla bla\n'
+        b'app1:5432:*:glassfish:ov4Lael3ugoh\n'
+        b'\n')
+PGPASS_FIXTURE_CORRUPT = (
+        b'localhost:5432:\n'
+        b'# bla bla\n'
+        b'app1:5432tt:*:glassfish:ov4Lael3ugoh\n'
+        b'\n')
+PGPASS_FIXTURE_ESCAPED = (
+        b'local\\host:5432:*:glass\\:fish:ov:La\\:nel3::oh\n')
+PGPASS_FIXTURE_LOOKUP = (
+        b'app:5432:vdc:glassfish:passwd1\n'
+        b'app:5432:*:glassfish:passwd2\n'
+        b'app:5432:*:uhu:passwd3\n'
+        b'app:5432:*:*:passwd4\n'
+        b'app:5434:*:glassfish:passwd5\n'
+        b'localhost:5432:*:glassfish:passwd6\n')
+
+_PARSE_CASES = (
+    ('normal', 'pgpass_ok', 2, None),
+    ('corrupt', 'pgpass_corrupt', 0, None),
+    ('escaped', 'pgpass_escaped', 1, '_check_escaped_entry'),
+)
+"""
+The cases of test_parse_entries - a description, the name of the class
+attribute holding the fixture filename, the expected entry count and
+an optional name of a method checking the parsed entries.
+"""
+
 #==============================================================================
 class TestPgPassFile(DbHandlerTestcase):
 
+    #--------------------------------------------------------------------------
+    @classmethod
+    def setUpClass(cls):
+
+        super(TestPgPassFile, cls).setUpClass()
+
+        cls.tmpdir = tempfile.mkdtemp()
+
+        cls.pgpass_ok = cls._write_fixture(
+                '.pgpass_ok', PGPASS_FIXTURE_OK)
+        cls.pgpass_corrupt = cls._write_fixture(
+                '.pgpass_corrupt', PGPASS_FIXTURE_CORRUPT)
+        cls.pgpass_escaped = cls._write_fixture(
+                '.pgpass_escaped', PGPASS_FIXTURE_ESCAPED)
+        cls.pgpass_lookup = cls._write_fixture(
+                '.pgpass_lookup', PGPASS_FIXTURE_LOOKUP)
+
+    #--------------------------------------------------------------------------
+    @classmethod
+    def tearDownClass(cls):
+
+        shutil.rmtree(cls.tmpdir, True)
+
+    #--------------------------------------------------------------------------
+    @classmethod
+    def _write_fixture(cls, name, content):
+        """
+        Writes the given content into a new read-only fixture file in the
+        class tmpdir with one single write() call and gives back its
+        filename.
+        """
+
+        filename = os.path.join(cls.tmpdir, name)
+        fh = open(filename, 'wb')
+        try:
+            os.fchmod(fh.fileno(), stat.S_IRUSR | stat.S_IWUSR)
+            fh.write(content)
+            if hasattr(os, 'posix_fadvise'):
+                # Hint the kernel to keep the fresh written file in the
+                # page cache for the upcoming reads of the tests.
+                os.posix_fadvise(
+                        fh.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            fh.close()
+        return filename
+
+    #--------------------------------------------------------------------------
+    def _make_pgpass(self, content):
+        """
+        Creates a mutable temporary .pgpass file with the given content
+        for tests, which manipulate the file afterwards. The file
+        descriptor is kept open, so the caller may change the file mode
+        with os.fchmod(). The caller is responsible for closing the
+        descriptor and removing the file.
+
+        mkstemp() already creates the file with mode 0600, an extra
+        chmod is not needed.
+        """
+
+        (fd, filename) = tempfile.mkstemp()
+        os.write(fd, content)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        return (fd, filename)
+
     #--------------------------------------------------------------------------
     def setUp(self):
         self.pgpassfile = os.path.join(os.path.dirname(sys.argv[0]), '.pgpass')
@@ -69,15 +172,25 @@ class TestPgPassFile(DbHandlerTestcase):
         log.debug("%s raised on not existing .pgpass file %r: %s",
                 'PgPassFileNotExistsError', self.pgpassfile_fail, e)
 
+    #--------------------------------------------------------------------------
+    def test_precompiled_line_regex(self):
+
+        log.info("Testing, that the .pgpass line regex is precompiled "
+                "at module level.")
+
+        re_line = pb_dbhandler.pgpass._re_pgpass_line
+        self.assertIsInstance(re_line, type(re.compile('')))
+
+        # Parsing a file must reuse the module level pattern object
+        # instead of compiling a new one per parse.
+        pgpass = PgPassFile(filename = self.pgpass_ok, verbose = self.verbose)
+        pgpass.entries()
+        self.assertIs(re_line, pb_dbhandler.pgpass._re_pgpass_line)
+
     #--------------------------------------------------------------------------
     def test_read_pgpass(self):
 
-        (fd, filename) = tempfile.mkstemp()
-        os.write(fd, 'bla\n')
-        os.close(fd)
-        mode = stat.S_IRUSR | stat.S_IWUSR
-        log.debug("Changing permissions of %r to %o.", filename, mode)
-        os.chmod(filename, mode)
+        (fd, filename) = self._make_pgpass(b'bla\n')
 
         try:
             log.info("Testing reading of a .pgpass file.")
@@ -89,7 +202,7 @@ class TestPgPassFile(DbHandlerTestcase):
 
             mode = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
             log.debug("Changing permissions of %r to %o.", filename, mode)
-            os.chmod(filename, mode)
+            os.fchmod(fd, mode)
             content = pgpass.read()
             log.debug("Got file content of %r: %r", filename, content)
             self.assertIsInstance(content, basestring)
@@ -105,178 +218,115 @@ class TestPgPassFile(DbHandlerTestcase):
             self.assertEqual(content, 'bla\n')
 
         finally:
-            if os.path.exists(filename):
+            os.close(fd)
+            if self._cached_exists(filename):
                 os.remove(filename)
+                self._forget_exists(filename)
 
     #--------------------------------------------------------------------------
-    def test_parse_entries1(self):
-
-        (fd, filename) = tempfile.mkstemp()
-        os.write(fd, 'localhost:5432:*:glassfish:ov4Lael3ugoh\n')
-        os.write(fd, '# bla bla\n')
-        os.write(fd, 'app1:5432:*:glassfish:ov4Lael3ugoh\n')
-        os.write(fd, '\n')
-        os.close(fd)
-        mode = stat.S_IRUSR | stat.S_IWUSR
-        os.chmod(filename, mode)
-
-        try:
+    def _check_escaped_entry(self, entries):
+        """Checks the unescaped fields of the escaped fixture entry."""
 
-            log.info("Testing parsing of a normal .pgpass file.")
-            pgpass = PgPassFile(filename = filename, verbose = self.verbose)
-
-            entries = pgpass.entries()
-            if self.verbose > 2:
-                l = []
-                for e in entries:
-                    l.append(e.as_dict(True))
-                log.debug("Got entries:\n%s", pp(l))
-
-            self.assertEqual(len(entries), 2)
-
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
+        self.assertEqual(entries[0].hostname, r'local\host')
+        self.assertEqual(entries[0].port, 5432)
+        self.assertEqual(entries[0].database, None)
+        self.assertEqual(entries[0].username, r'glass:fish')
+        self.assertEqual(entries[0].password, r'ov:La:nel3::oh')
 
     #--------------------------------------------------------------------------
-    def test_parse_entries2(self):
+    def test_parse_entries(self):
 
-        (fd, filename) = tempfile.mkstemp()
-        os.write(fd, 'localhost:5432:\n')
-        os.write(fd, '# bla bla\n')
-        os.write(fd, 'app1:5432tt:*:glassfish:ov4Lael3ugoh\n')
-        os.write(fd, '\n')
-        os.close(fd)
-        mode = stat.S_IRUSR | stat.S_IWUSR
-        os.chmod(filename, mode)
-
-        try:
-
-            log.info("Testing parsing of a corrupt .pgpass file.")
-            pgpass = PgPassFile(filename = filename, verbose = self.verbose)
-
-            entries = pgpass.entries()
-            if self.verbose > 2:
-                log.debug("Got entries:\n%r", entries)
-
-            self.assertEqual(len(entries), 0)
-
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
-
-    #--------------------------------------------------------------------------
-    def test_parse_entries3(self):
-
-        (fd, filename) = tempfile.mkstemp()
-        os.write(fd, 'local\\host:5432:*:glass\\:fish:ov:La\\:nel3::oh\n')
-        os.close(fd)
-        mode = stat.S_IRUSR | stat.S_IWUSR
-        os.chmod(filename, mode)
-
-        try:
+        for (name, fixture_attr, exp_count, check) in _PARSE_CASES:
 
-            log.info("Testing parsing of a .pgpass file with escaped fields.")
-            pgpass = PgPassFile(filename = filename, verbose = self.verbose)
+            log.info("Testing parsing of a %s .pgpass file.", name)
+            pgpass = PgPassFile(filename = getattr(self, fixture_attr),
+                    verbose = self.verbose)
 
             entries = pgpass.entries()
             if self.verbose > 2:
-                log.debug("Got entries:\n%r", entries)
+                log.debug("Got entries:\n%s",
+                        LazyPP(lambda: [e.as_dict(True) for e in entries]))
 
-            self.assertEqual(len(entries), 1)
-            self.assertEqual(entries[0].hostname, r'local\host')
-            self.assertEqual(entries[0].port, 5432)
-            self.assertEqual(entries[0].database, None)
-            self.assertEqual(entries[0].username, r'glass:fish')
-            self.assertEqual(entries[0].password, r'ov:La:nel3::oh')
-
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
+            self.assertEqual(len(entries), exp_count,
+                    "Parsing the %s .pgpass file gave %d entries "
+                    "instead of %d." % (name, len(entries), exp_count))
+            if check is not None:
+                getattr(self, check)(entries)
 
     #--------------------------------------------------------------------------
     def test_get_passwd(self):
 
-        (fd, filename) = tempfile.mkstemp()
-        os.write(fd, 'app:5432:vdc:glassfish:passwd1\n')
-        os.write(fd, 'app:5432:*:glassfish:passwd2\n')
-        os.write(fd, 'app:5432:*:uhu:passwd3\n')
-        os.write(fd, 'app:5432:*:*:passwd4\n')
-        os.write(fd, 'app:5434:*:glassfish:passwd5\n')
-        os.write(fd, 'localhost:5432:*:glassfish:passwd6\n')
-        os.close(fd)
-        mode = stat.S_IRUSR | stat.S_IWUSR
-        os.chmod(filename, mode)
-
-        try:
-
-            log.info("Testing parsing of a .pgpass file with escaped fields.")
-            pgpass = PgPassFile(filename = filename, verbose = self.verbose)
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'app', port = 5432, database = 'vdc',
-                    username = 'glassfish'
-            )
-            self.assertEqual(pwd, 'passwd1')
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'app', port = 5432, database = 'bla',
-                    username = 'glassfish'
-            )
-            self.assertEqual(pwd, 'passwd2')
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'app', port = 5432, database = 'vdc',
-                    username = 'uhu'
-            )
-            self.assertEqual(pwd, 'passwd3')
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'app', port = 5432, database = 'bla',
-                    username = 'uhu'
-            )
-            self.assertEqual(pwd, 'passwd3')
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'app', port = 5432, database = 'bla',
-                    username = 'itsme'
-            )
-            self.assertEqual(pwd, 'passwd4')
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'app', port = 5434, database = 'bla',
-                    username = 'glassfish'
-            )
-            self.assertEqual(pwd, 'passwd5')
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'app', port = 5434, database = 'bla',
-                    username = 'itsme'
-            )
-            self.assertEqual(pwd, None)
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'localhost', port = 5432, database = 'bla',
-                    username = 'glassfish'
-            )
-            self.assertEqual(pwd, 'passwd6')
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'localhost', port = 5432, database = 'bla',
-                    username = 'itsme'
-            )
-            self.assertEqual(pwd, None)
-
-            pwd = pgpass.get_passwd(
-                    hostname = 'somewhere', port = 5432, database = 'bla',
-                    username = 'glassfish'
-            )
-            self.assertEqual(pwd, None)
-
-
-        finally:
-            if os.path.exists(filename):
-                os.remove(filename)
+        log.info("Testing get_passwd() on a .pgpass file.")
+        pgpass = PgPassFile(filename = self.pgpass_lookup,
+                verbose = self.verbose)
+
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5432, database = 'vdc',
+                username = 'glassfish'
+        )
+        self.assertEqual(pwd, 'passwd1')
+
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5432, database = 'bla',
+                username = 'glassfish'
+        )
+        self.assertEqual(pwd, 'passwd2')
+
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5432, database = 'vdc',
+                username = 'uhu'
+        )
+        self.assertEqual(pwd, 'passwd3')
+
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5432, database = 'bla',
+                username = 'uhu'
+        )
+        self.assertEqual(pwd, 'passwd3')
+
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5432, database = 'bla',
+                username = 'itsme'
+        )
+        self.assertEqual(pwd, 'passwd4')
+
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5434, database = 'bla',
+                username = 'glassfish'
+        )
+        self.assertEqual(pwd, 'passwd5')
+
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5434, database = 'bla',
+                username = 'itsme'
+        )
+        self.assertEqual(pwd, None)
+
+        pwd = pgpass.get_passwd(
+                hostname = 'localhost', port = 5432, database = 'bla',
+                username = 'glassfish'
+        )
+        self.assertEqual(pwd, 'passwd6')
+
+        pwd = pgpass.get_passwd(
+                hostname = 'localhost', port = 5432, database = 'bla',
+                username = 'itsme'
+        )
+        self.assertEqual(pwd, None)
+
+        pwd = pgpass.get_passwd(
+                hostname = 'somewhere', port = 5432, database = 'bla',
+                username = 'glassfish'
+        )
+        self.assertEqual(pwd, None)
+
+        log.debug("Repeating a lookup, which must be served from "
+                "the password cache.")
+        pwd = pgpass.get_passwd(
+                hostname = 'app', port = 5432, database = 'vdc',
+                username = 'glassfish'
+        )
+        self.assertEqual(pwd, 'passwd1')
 
 #==============================================================================
 
@@ -290,14 +340,8 @@ if __name__ == '__main__':
 
     log.info("Starting tests ...")
 
-    suite = unittest.TestSuite()
-
-    suite.addTest(TestPgPassFile('test_pgpass_object', verbose))
-    suite.addTest(TestPgPassFile('test_read_pgpass', verbose))
-    suite.addTest(TestPgPassFile('test_parse_entries1', verbose))
-    suite.addTest(TestPgPassFile('test_parse_entries2', verbose))
-    suite.addTest(TestPgPassFile('test_parse_entries3', verbose))
-    suite.addTest(TestPgPassFile('test_get_passwd', verbose))
+    TestPgPassFile.default_verbose = verbose
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestPgPassFile)
 
     runner = unittest.TextTestRunner(verbosity = verbose)
 